@@ -0,0 +1,70 @@
+"""Hot per-request helpers: hashing, claim-token codec and input validation.
+
+Kept free of framework imports and fully type-annotated so the module can be
+compiled ahead of time with mypyc (``mypyc app/fastpath.py``); the compiled
+extension transparently shadows this file. See the backend README.
+"""
+
+import base64
+import hashlib
+import re
+
+# Bound once at import time so the hot path skips the module attribute lookup;
+# OpenSSL already dispatches to SHA-NI where the CPU supports it.
+_sha256 = hashlib.sha256
+_blake2b = hashlib.blake2b
+
+DEVICE_ID_RE = re.compile(r"^[A-Za-z0-9_-]{16,128}$")
+# Bound method hoisted once so per-request validation skips the attribute
+# lookup and re's pattern-cache probe.
+_device_fullmatch = DEVICE_ID_RE.fullmatch
+
+# Actor hashing only needs a fast keyed collision-resistant digest, not the
+# external SHA-256 protocol used for claim tokens. Keyed BLAKE2b is faster on
+# short inputs and folds the pepper in as the MAC key.
+_actor_key = b""
+
+
+def init_actor_key(pepper: str) -> None:
+    """Derive the 32-byte BLAKE2b key from ACTOR_PEPPER; called once at import
+    of the app module, after the environment is loaded."""
+    global _actor_key
+    _actor_key = _sha256(pepper.encode("utf-8")).digest()
+
+
+def actor_hash_hex(v: str) -> str:
+    return _blake2b(v.encode("utf-8"), key=_actor_key, digest_size=32).hexdigest()
+
+
+def token_hash_hex(raw: bytes) -> str:
+    return _sha256(raw).hexdigest()
+
+
+def encode_claim_token(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def claim_token_hash(token: str) -> str | None:
+    # Inverse of encode_claim_token: decode the client's token back to raw
+    # bytes and hash those, so SHA-256 sees 32 bytes instead of a 64-char
+    # hex string. Returns None for tokens that are not valid base64.
+    try:
+        raw = base64.urlsafe_b64decode(token.encode("ascii") + b"=" * (-len(token) % 4))
+    except (ValueError, UnicodeEncodeError):
+        return None
+    return _sha256(raw).hexdigest()
+
+
+def is_valid_code(code: str) -> bool:
+    # Equivalent to fullmatch(r"[0-9A-Za-z]{4}") without invoking the regex
+    # engine: ASCII alphanumerics are exactly 0-9A-Za-z.
+    return len(code) == 4 and code.isascii() and code.isalnum()
+
+
+def normalize_device_id(value: str | None) -> str:
+    if not value:
+        return ""
+    value = value.strip()
+    if not _device_fullmatch(value):
+        return ""
+    return value
@@ -1,36 +1,61 @@
 import os
 import asyncio
-import hashlib
-import re
+import hmac
 import secrets
 import smtplib
-from datetime import datetime, timezone, timedelta
+from datetime import timedelta
 from email.message import EmailMessage
 
 import asyncpg
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
 
+from .fastpath import (
+    actor_hash_hex,
+    claim_token_hash,
+    encode_claim_token,
+    init_actor_key,
+    is_valid_code,
+    normalize_device_id,
+    token_hash_hex,
+)
+
+# uvicorn[standard] already prefers uvloop, but installing it here makes the
+# faster loop the default for any way this module gets served.
+try:
+    import uvloop
+
+    uvloop.install()
+except ImportError:
+    pass
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 CODE_HASH = os.getenv("CODE_HASH")
+CODE_PLAINTEXT = os.getenv("CODE_PLAINTEXT")
 ACTOR_PEPPER = os.getenv("ACTOR_PEPPER", "")
 TEST_MODE = os.getenv("TEST_MODE", "false").lower() == "true"
 ADMIN_RESET_KEY = os.getenv("ADMIN_RESET_KEY")
 BLOCK_MINUTES = int(os.getenv("BLOCK_MINUTES", "10"))
-CORS_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS", "").split(",") if o.strip()]
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "10"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "50"))
+# Set to 0 when running behind PgBouncer in transaction pooling mode, which
+# cannot track per-connection prepared statements.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+# Set rather than list so the per-request origin membership check is O(1).
+CORS_ORIGINS = {o.strip() for o in os.getenv("CORS_ORIGINS", "").split(",") if o.strip()}
 ALLOW_CREDENTIALS = os.getenv("CORS_ALLOW_CREDENTIALS", "true").lower() == "true"
 COOKIE_SECURE = os.getenv("COOKIE_SECURE", "true" if not TEST_MODE else "false").lower() == "true"
 COOKIE_SAMESITE = os.getenv("COOKIE_SAMESITE", "lax").lower()
 DEVICE_COOKIE_NAME = "device_id"
 DEVICE_COOKIE_MAX_AGE_DAYS = int(os.getenv("DEVICE_COOKIE_MAX_AGE_DAYS", "365"))
-DEVICE_ID_RE = re.compile(r"^[A-Za-z0-9_-]{16,128}$")
+init_actor_key(ACTOR_PEPPER)
 
 SMTP_HOST = os.getenv("SMTP_HOST")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
@@ -41,13 +66,62 @@ SMTP_TO = os.getenv("SMTP_TO")
 SMTP_TLS = os.getenv("SMTP_TLS", "true").lower() == "true"
 
 ph = PasswordHasher()
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 pool: asyncpg.pool.Pool | None = None
+_listener_conn: asyncpg.Connection | None = None
+email_queue: asyncio.Queue | None = None
+_email_task: asyncio.Task | None = None
+_smtp_server: smtplib.SMTP | None = None
 
 if COOKIE_SAMESITE not in {"lax", "strict", "none"}:
     COOKIE_SAMESITE = "lax"
 
 
+# Hot-path SQL as module-level constants: asyncpg prepares each statement
+# once per connection and caches it by query text, so reusing the same
+# string objects keeps every call on the warm prepared-statement path.
+SQL_ENSURE_STATE = "INSERT INTO contest_state(id) VALUES (1) ON CONFLICT DO NOTHING"
+SQL_SELECT_WINNER = "SELECT winner_actor_hash FROM contest_state WHERE id=1"
+SQL_SELECT_LOCK_FOR_UPDATE = (
+    "SELECT failed_count, blocked_until, (blocked_until > NOW()) AS is_blocked "
+    "FROM attempt_locks WHERE actor_hash=$1 FOR UPDATE"
+)
+# One round-trip for the whole failure branch: bump the counter, and on the
+# third strike reset it and start the block window, all in a single UPSERT.
+SQL_RECORD_FAILURE = """
+INSERT INTO attempt_locks(actor_hash, failed_count) VALUES($1, 1)
+ON CONFLICT (actor_hash) DO UPDATE SET
+  failed_count = CASE WHEN attempt_locks.failed_count + 1 >= 3 THEN 0
+                      ELSE attempt_locks.failed_count + 1 END,
+  blocked_until = CASE WHEN attempt_locks.failed_count + 1 >= 3 THEN NOW() + $2::interval
+                       ELSE attempt_locks.blocked_until END
+RETURNING failed_count, blocked_until, (blocked_until > NOW()) AS is_blocked
+"""
+# Optimistic winner claim fused with the token insert: the UPDATE only
+# succeeds while no winner is set (so losing attempts never queue behind a
+# row lock on contest_state), and the token row is only written when the
+# UPDATE claimed the win. Zero rows back means another request won first.
+SQL_CLAIM_WIN = """
+WITH won AS (
+  UPDATE contest_state SET winner_actor_hash=$1, winner_claimed_at=NOW()
+  WHERE id=1 AND winner_actor_hash IS NULL RETURNING id
+)
+INSERT INTO winner_claim_tokens(token_hash, actor_hash, expires_at)
+SELECT $2, $1, NOW() + INTERVAL '15 minutes' FROM won
+RETURNING 1
+"""
+SQL_SELECT_LIVE_TOKENS = (
+    "SELECT token_hash FROM winner_claim_tokens WHERE used_at IS NULL AND expires_at > NOW()"
+)
+SQL_SELECT_TOKEN_FOR_UPDATE = (
+    "SELECT actor_hash, used_at, (expires_at < NOW()) AS is_expired "
+    "FROM winner_claim_tokens WHERE token_hash=$1 FOR UPDATE"
+)
+SQL_INSERT_CONTACT = "INSERT INTO winner_contacts(actor_hash, name, email, phone) VALUES($1,$2,$3,$4)"
+SQL_MARK_TOKEN_USED = "UPDATE winner_claim_tokens SET used_at=NOW() WHERE token_hash=$1"
+SQL_MARK_CONTACT_SUBMITTED = "UPDATE contest_state SET contact_submitted=true WHERE id=1"
+
+
 class EnterCodeBody(BaseModel):
     code: str
 
@@ -59,47 +133,108 @@ class SubmitContactBody(BaseModel):
     phone: str | None = None
 
 
+def _on_contest_state_change(_conn, _pid, _channel, payload: str) -> None:
+    # Runs on the event loop via the dedicated listener connection whenever
+    # the contest_state trigger fires (winner set or admin reset).
+    if payload == "closed":
+        app.state.closed.set()
+    else:
+        app.state.closed.clear()
+
+
 @app.on_event("startup")
 async def startup():
-    global pool
+    global pool, _listener_conn, email_queue, _email_task
     if not DATABASE_URL:
         raise RuntimeError("DATABASE_URL is required")
     if not CODE_HASH:
         raise RuntimeError("CODE_HASH is required")
     if TEST_MODE and not ADMIN_RESET_KEY:
         raise RuntimeError("TEST_MODE=true requires ADMIN_RESET_KEY")
-    pool = await asyncpg.create_pool(DATABASE_URL)
+    if CODE_PLAINTEXT:
+        # Pay the Argon2 cost once at boot; per-request verification then
+        # becomes a constant-time string compare.
+        try:
+            ph.verify(CODE_HASH, CODE_PLAINTEXT)
+        except VerifyMismatchError:
+            raise RuntimeError("CODE_PLAINTEXT does not match CODE_HASH")
+    pool = await asyncpg.create_pool(
+        DATABASE_URL,
+        min_size=DB_POOL_MIN,
+        max_size=DB_POOL_MAX,
+        max_inactive_connection_lifetime=300,
+        command_timeout=5,
+        statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+    )
+
+    # Process-local "contest closed" latch: once a winner exists the common
+    # path can answer without a DB round-trip. The locked SELECT inside the
+    # transaction remains the correctness backstop while this is unset.
+    app.state.closed = asyncio.Event()
+    # Negative cache of outstanding claim-token hashes: requests with a
+    # token we never issued are rejected without a DB round-trip. Exact (a
+    # plain set, not a bloom filter) because at most a handful of tokens
+    # ever exist; like app.state.closed it assumes a single worker process.
+    app.state.claim_tokens = set()
+
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(SQL_SELECT_WINNER)
+        if row and row.get("winner_actor_hash"):
+            app.state.closed.set()
+        for token_row in await conn.fetch(SQL_SELECT_LIVE_TOKENS):
+            app.state.claim_tokens.add(token_row["token_hash"])
+
+    # Dedicated connection for LISTEN/NOTIFY: the contest_state trigger keeps
+    # the closed flag current even when another process sets the winner, so
+    # /api/status never has to query the DB.
+    _listener_conn = await asyncpg.connect(DATABASE_URL)
+    await _listener_conn.add_listener("contest_state_change", _on_contest_state_change)
+
+    if SMTP_HOST and SMTP_TO and SMTP_FROM:
+        email_queue = asyncio.Queue()
+        _email_task = asyncio.create_task(email_worker())
 
 
 @app.on_event("shutdown")
 async def shutdown():
-    global pool
+    global pool, _listener_conn, _smtp_server
+    if _listener_conn:
+        await _listener_conn.close()
+        _listener_conn = None
+    if _email_task:
+        await email_queue.put(None)
+        await _email_task
+    if _smtp_server:
+        try:
+            _smtp_server.quit()
+        except Exception:
+            pass
+        _smtp_server = None
     if pool:
         await pool.close()
 
 
-def sha256_hex(v: str) -> str:
-    return hashlib.sha256(v.encode("utf-8")).hexdigest()
-
-
 def get_actor_hash(request: Request) -> str:
+    # Memoized on request.state so repeated callers (handlers, middleware)
+    # pay the header lookups and hash at most once per request.
+    cached = getattr(request.state, "actor_hash", None)
+    if cached:
+        return cached
     ip = request.client.host or ""
     ua = request.headers.get("user-agent", "")
     device = getattr(request.state, "device_id", "") or request.cookies.get(DEVICE_COOKIE_NAME, "")
-    return sha256_hex(f"{ip}|{ua}|{device}|{ACTOR_PEPPER}")
-
-
-def normalize_device_id(value: str | None) -> str:
-    if not value:
-        return ""
-    value = value.strip()
-    if not DEVICE_ID_RE.fullmatch(value):
-        return ""
-    return value
+    actor_hash = actor_hash_hex(f"{ip}|{ua}|{device}")
+    request.state.actor_hash = actor_hash
+    return actor_hash
 
 
 @app.middleware("http")
 async def ensure_device_cookie(request: Request, call_next):
+    # Only API endpoints use the device identity; health checks, docs and
+    # CORS preflights skip the regex, CSPRNG and cookie work entirely.
+    if request.method == "OPTIONS" or not request.url.path.startswith("/api/"):
+        return await call_next(request)
+
     header_device_id = normalize_device_id(request.headers.get("x-device-id"))
     cookie_device_id = normalize_device_id(request.cookies.get(DEVICE_COOKIE_NAME))
 
@@ -110,7 +245,9 @@ async def ensure_device_cookie(request: Request, call_next):
     elif cookie_device_id:
         device_id = cookie_device_id
     else:
-        device_id = secrets.token_hex(16)
+        # token_urlsafe gives the same 16 bytes of entropy as token_hex in a
+        # 22-char cookie instead of 32, and still matches DEVICE_ID_RE.
+        device_id = secrets.token_urlsafe(16)
         set_cookie = True
 
     request.state.device_id = device_id
@@ -130,7 +267,21 @@ async def ensure_device_cookie(request: Request, call_next):
     return response
 
 
+def _smtp_connect() -> smtplib.SMTP:
+    server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10)
+    server.ehlo()
+    if SMTP_TLS:
+        server.starttls()
+        server.ehlo()
+    if SMTP_USER and SMTP_PASSWORD:
+        server.login(SMTP_USER, SMTP_PASSWORD)
+    return server
+
+
 def send_email_sync(subject: str, body: str) -> None:
+    # Reuses one SMTP connection across sends so the TCP+TLS+AUTH handshake
+    # is paid once, not per email; reconnects once if the server dropped it.
+    global _smtp_server
     if not SMTP_HOST or not SMTP_TO or not SMTP_FROM:
         raise RuntimeError("SMTP is not configured")
 
@@ -140,19 +291,38 @@ def send_email_sync(subject: str, body: str) -> None:
     message["To"] = SMTP_TO
     message.set_content(body)
 
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10) as server:
-        server.ehlo()
-        if SMTP_TLS:
-            server.starttls()
-            server.ehlo()
-        if SMTP_USER and SMTP_PASSWORD:
-            server.login(SMTP_USER, SMTP_PASSWORD)
-        server.send_message(message)
+    if _smtp_server is None:
+        _smtp_server = _smtp_connect()
+    try:
+        _smtp_server.send_message(message)
+    except (smtplib.SMTPException, OSError):
+        try:
+            _smtp_server.close()
+        except Exception:
+            pass
+        _smtp_server = _smtp_connect()
+        _smtp_server.send_message(message)
+
+
+async def email_worker() -> None:
+    while True:
+        item = await email_queue.get()
+        if item is None:
+            break
+        subject, body = item
+        try:
+            await asyncio.to_thread(send_email_sync, subject, body)
+        except Exception:
+            # Same behaviour as the old inline send: a failed email must not
+            # break the winner flow.
+            pass
 
 
+# Registered after ensure_device_cookie on purpose: add_middleware prepends,
+# so CORS ends up outermost and preflights never reach the cookie middleware.
 if CORS_ORIGINS:
     allow_credentials = ALLOW_CREDENTIALS
-    if CORS_ORIGINS == ["*"]:
+    if CORS_ORIGINS == {"*"}:
         allow_credentials = False
     app.add_middleware(
         CORSMiddleware,
@@ -163,184 +333,149 @@ if CORS_ORIGINS:
     )
 
 
+@app.exception_handler(Exception)
+async def server_error_handler(_request: Request, _exc: Exception):
+    # Transactions roll back via their context manager; this only shapes the
+    # response while uvicorn still logs the traceback.
+    return ORJSONResponse({"ok": False, "reason": "server_error"}, status_code=500)
+
+
 @app.get("/api/status")
 async def status():
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow("SELECT winner_actor_hash FROM contest_state WHERE id=1")
-        closed = bool(row and row.get("winner_actor_hash"))
-        return {"ok": True, "closed": closed}
+    # Served entirely from memory; LISTEN/NOTIFY keeps the flag current.
+    return {"ok": True, "closed": app.state.closed.is_set()}
 
 
 @app.post("/api/enter-code")
 async def enter_code(body: EnterCodeBody, request: Request):
     code = (body.code or "").strip()
-    if not re.fullmatch(r"[0-9A-Za-z]{4}", code):
-        return JSONResponse({"ok": False, "reason": "invalid_format"}, status_code=400)
+    if not is_valid_code(code):
+        return ORJSONResponse({"ok": False, "reason": "invalid_format"}, status_code=400)
 
-    actor_hash = get_actor_hash(request)
+    if app.state.closed.is_set():
+        return ORJSONResponse({"ok": False, "reason": "already_won"}, status_code=409)
 
-    async with pool.acquire() as conn:
-        tr = conn.transaction()
-        await tr.start()
-        try:
-            await conn.execute("INSERT INTO contest_state(id) VALUES (1) ON CONFLICT DO NOTHING")
-            state = await conn.fetchrow("SELECT winner_actor_hash FROM contest_state WHERE id=1 FOR UPDATE")
-            if state and state.get("winner_actor_hash"):
-                await tr.rollback()
-                return JSONResponse({"ok": False, "reason": "already_won"}, status_code=409)
-
-            lock = await conn.fetchrow(
-                "SELECT failed_count, blocked_until FROM attempt_locks WHERE actor_hash=$1 FOR UPDATE",
-                actor_hash,
+    # Everything CPU-side happens before a pooled connection is held: the
+    # shorter the acquire-to-commit window, the more effective the pool is
+    # under concurrency. The claim token is generated up front even though
+    # most attempts discard it; a few microseconds of CSPRNG is cheaper than
+    # spending them on a checked-out connection.
+    actor_hash = get_actor_hash(request)
+    raw_token = secrets.token_bytes(32)
+    token_hash = token_hash_hex(raw_token)
+    claim_token = encode_claim_token(raw_token)
+
+    async with pool.acquire() as conn, conn.transaction():
+        await conn.execute(SQL_ENSURE_STATE)
+        state = await conn.fetchrow(SQL_SELECT_WINNER)
+        if state and state.get("winner_actor_hash"):
+            return ORJSONResponse({"ok": False, "reason": "already_won"}, status_code=409)
+
+        lock = await conn.fetchrow(SQL_SELECT_LOCK_FOR_UPDATE, actor_hash)
+
+        if lock and lock["is_blocked"]:
+            return ORJSONResponse(
+                {"ok": False, "reason": "blocked", "blockedUntil": lock["blocked_until"]},
+                status_code=429,
             )
 
-            now = datetime.now(timezone.utc)
-            if lock and lock.get("blocked_until") and lock["blocked_until"] > now:
-                await tr.rollback()
-                return JSONResponse(
-                    {"ok": False, "reason": "blocked", "blockedUntil": lock["blocked_until"].isoformat()},
-                    status_code=429,
-                )
-
-            # verify code
+        # verify code (constant-time compare when the plaintext was
+        # checked against CODE_HASH at startup, Argon2 otherwise)
+        if CODE_PLAINTEXT:
+            ok = hmac.compare_digest(code, CODE_PLAINTEXT)
+        else:
             try:
                 ok = ph.verify(CODE_HASH, code)
             except VerifyMismatchError:
                 ok = False
 
-            if not ok:
-                failed = (lock["failed_count"] if lock else 0) + 1
-                if not lock:
-                    await conn.execute(
-                        "INSERT INTO attempt_locks(actor_hash, failed_count) VALUES($1,$2)", actor_hash, failed
-                    )
-                else:
-                    await conn.execute(
-                        "UPDATE attempt_locks SET failed_count=$2 WHERE actor_hash=$1", actor_hash, failed
-                    )
-
-                if failed >= 3:
-                    blocked_until = now + timedelta(minutes=BLOCK_MINUTES)
-                    await conn.execute(
-                        "UPDATE attempt_locks SET failed_count=0, blocked_until=$2 WHERE actor_hash=$1",
-                        actor_hash,
-                        blocked_until,
-                    )
-
-                    await tr.commit()
-                    return JSONResponse(
-                        {"ok": False, "reason": "blocked", "blockedUntil": blocked_until.isoformat()},
-                        status_code=429,
-                    )
-
-                remaining = max(0, 3 - failed)
-                await tr.commit()
-                return JSONResponse({"ok": False, "reason": "wrong_code", "remaining": remaining}, status_code=401)
-
-            # correct code: create claim token and set winner
-            raw_token = secrets.token_hex(32)
-            token_hash = sha256_hex(raw_token)
-
-            update_result = await conn.execute(
-                "UPDATE contest_state SET winner_actor_hash=$1, winner_claimed_at=NOW() WHERE id=1",
-                actor_hash,
-            )
-            if update_result != "UPDATE 1":
-                raise RuntimeError("contest_state row is missing")
+        if not ok:
+            failure = await conn.fetchrow(SQL_RECORD_FAILURE, actor_hash, timedelta(minutes=BLOCK_MINUTES))
+            if failure["is_blocked"]:
+                return ORJSONResponse(
+                    {"ok": False, "reason": "blocked", "blockedUntil": failure["blocked_until"]},
+                    status_code=429,
+                )
 
-            await conn.execute(
-                "INSERT INTO winner_claim_tokens(token_hash, actor_hash, expires_at) VALUES($1,$2,NOW()+INTERVAL '15 minutes')",
-                token_hash,
-                actor_hash,
-            )
+            remaining = max(0, 3 - failure["failed_count"])
+            return ORJSONResponse({"ok": False, "reason": "wrong_code", "remaining": remaining}, status_code=401)
 
-            await tr.commit()
-            return JSONResponse({"ok": True, "claimToken": raw_token})
-        except Exception:
-            await tr.rollback()
-            return JSONResponse({"ok": False, "reason": "server_error"}, status_code=500)
+        # correct code: claim the win and store the token in one statement
+        won = await conn.fetchrow(SQL_CLAIM_WIN, actor_hash, token_hash)
+        if not won:
+            # Another request claimed the win between our unlocked read and
+            # the conditional UPDATE.
+            return ORJSONResponse({"ok": False, "reason": "already_won"}, status_code=409)
+
+    app.state.closed.set()
+    app.state.claim_tokens.add(token_hash)
+    return ORJSONResponse({"ok": True, "claimToken": claim_token})
 
 
 @app.post("/api/submit-contact")
 async def submit_contact(body: SubmitContactBody, _request: Request):
     claimToken = (body.claimToken or "").strip()
     if not claimToken or not body.name or not body.email:
-        return JSONResponse({"ok": False, "reason": "invalid_payload"}, status_code=400)
+        return ORJSONResponse({"ok": False, "reason": "invalid_payload"}, status_code=400)
+
+    token_hash = claim_token_hash(claimToken)
+    if token_hash is None or token_hash not in app.state.claim_tokens:
+        return ORJSONResponse({"ok": False, "reason": "unauthorized"}, status_code=401)
+
+    async with pool.acquire() as conn, conn.transaction():
+        token = await conn.fetchrow(SQL_SELECT_TOKEN_FOR_UPDATE, token_hash)
+        if not token:
+            return ORJSONResponse({"ok": False, "reason": "unauthorized"}, status_code=401)
+
+        if token["used_at"] or token["is_expired"]:
+            return ORJSONResponse({"ok": False, "reason": "unauthorized"}, status_code=401)
+
+        await conn.execute(
+            SQL_INSERT_CONTACT,
+            token["actor_hash"],
+            body.name.strip(),
+            body.email.strip(),
+            (body.phone or "").strip() or None,
+        )
 
-    token_hash = sha256_hex(claimToken)
+        await conn.execute(SQL_MARK_TOKEN_USED, token_hash)
+        await conn.execute(SQL_MARK_CONTACT_SUBMITTED)
 
-    async with pool.acquire() as conn:
-        tr = conn.transaction()
-        await tr.start()
-        try:
-            token = await conn.fetchrow(
-                "SELECT actor_hash, used_at, expires_at FROM winner_claim_tokens WHERE token_hash=$1 FOR UPDATE",
-                token_hash,
-            )
-            if not token:
-                await tr.rollback()
-                return JSONResponse({"ok": False, "reason": "unauthorized"}, status_code=401)
-
-            if token["used_at"] or token["expires_at"] < datetime.now(timezone.utc):
-                await tr.rollback()
-                return JSONResponse({"ok": False, "reason": "unauthorized"}, status_code=401)
-
-            await conn.execute(
-                "INSERT INTO winner_contacts(actor_hash, name, email, phone) VALUES($1,$2,$3,$4)",
-                token["actor_hash"],
-                body.name.strip(),
-                body.email.strip(),
-                (body.phone or "").strip() or None,
-            )
+    app.state.claim_tokens.discard(token_hash)
 
-            await conn.execute("UPDATE winner_claim_tokens SET used_at=NOW() WHERE token_hash=$1", token_hash)
-            await conn.execute("UPDATE contest_state SET contact_submitted=true WHERE id=1")
-            await tr.commit()
-
-            email_sent = False
-            if SMTP_HOST and SMTP_TO and SMTP_FROM:
-                subject = "Vinnare - Gymkompaniet-tävling"
-                lines = [
-                    "Vinnare:",
-                    f"Namn: {body.name.strip()}",
-                    f"E-post: {body.email.strip()}",
-                ]
-                if body.phone:
-                    lines.append(f"Telefon: {body.phone.strip()}")
-                body_text = "\n".join(lines)
-                try:
-                    await asyncio.to_thread(send_email_sync, subject, body_text)
-                    email_sent = True
-                except Exception:
-                    email_sent = False
-
-            return {"ok": True, "emailSent": email_sent}
-        except Exception:
-            await tr.rollback()
-            return JSONResponse({"ok": False, "reason": "server_error"}, status_code=500)
+    email_sent = False
+    if email_queue is not None:
+        subject = "Vinnare - Gymkompaniet-tävling"
+        lines = [
+            "Vinnare:",
+            f"Namn: {body.name.strip()}",
+            f"E-post: {body.email.strip()}",
+        ]
+        if body.phone:
+            lines.append(f"Telefon: {body.phone.strip()}")
+        await email_queue.put((subject, "\n".join(lines)))
+        email_sent = "queued"
+
+    return {"ok": True, "emailSent": email_sent}
 
 
 @app.post("/api/admin/reset")
 async def admin_reset(request: Request):
     if not TEST_MODE:
-        return JSONResponse({"ok": False, "reason": "not_found"}, status_code=404)
+        return ORJSONResponse({"ok": False, "reason": "not_found"}, status_code=404)
 
     key = request.headers.get("x-reset-key")
     if not key or key != ADMIN_RESET_KEY:
-        return JSONResponse({"ok": False, "reason": "unauthorized"}, status_code=401)
+        return ORJSONResponse({"ok": False, "reason": "unauthorized"}, status_code=401)
 
-    async with pool.acquire() as conn:
-        tr = conn.transaction()
-        await tr.start()
-        try:
-            await conn.execute(
-                "UPDATE contest_state SET winner_actor_hash = NULL, winner_claimed_at = NULL, contact_submitted = false WHERE id = 1"
-            )
-            await conn.execute("DELETE FROM winner_claim_tokens")
-            await conn.execute("DELETE FROM winner_contacts")
-            await conn.execute("DELETE FROM attempt_locks")
-            await tr.commit()
-            return {"ok": True, "reset": True}
-        except Exception:
-            await tr.rollback()
-            return JSONResponse({"ok": False, "reason": "server_error"}, status_code=500)
+    async with pool.acquire() as conn, conn.transaction():
+        await conn.execute(
+            "UPDATE contest_state SET winner_actor_hash = NULL, winner_claimed_at = NULL, contact_submitted = false WHERE id = 1"
+        )
+        await conn.execute("DELETE FROM winner_claim_tokens")
+        await conn.execute("DELETE FROM winner_contacts")
+        await conn.execute("DELETE FROM attempt_locks")
+
+    app.state.closed.clear()
+    app.state.claim_tokens.clear()
+    return {"ok": True, "reset": True}
@@ -20,6 +20,23 @@ CREATE TABLE IF NOT EXISTS winner_claim_tokens (
   used_at timestamptz
 );
 
+-- Push winner/reset changes to the API processes so /api/status can answer
+-- from memory instead of querying contest_state on every poll.
+CREATE OR REPLACE FUNCTION notify_contest_state_change() RETURNS trigger AS $$
+BEGIN
+  PERFORM pg_notify(
+    'contest_state_change',
+    CASE WHEN NEW.winner_actor_hash IS NULL THEN 'open' ELSE 'closed' END
+  );
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS contest_state_change ON contest_state;
+CREATE TRIGGER contest_state_change
+AFTER UPDATE ON contest_state
+FOR EACH ROW EXECUTE FUNCTION notify_contest_state_change();
+
 CREATE TABLE IF NOT EXISTS winner_contacts (
   id bigserial PRIMARY KEY,
   actor_hash text NOT NULL UNIQUE,